@@ -7,14 +7,33 @@ import signal
 import argparse
 import argcomplete
 import logging
+import asyncio
+import atexit
+import functools
+import hashlib
+import shutil
+import subprocess
+import mmap
+import queue
+
+from meco_options import MAX_MESSAGE_LENGTH, MESSAGE_SIZE_OPTIONS, FLOW_CONTROL_OPTIONS, CHANNEL_OPTIONS, use_upb
+
+use_upb()
+
 import grpc
 from concurrent import futures
 import yaml
-import json
-import psutil  # For process checking
+import orjson
+import ijson
 
 import meco_pb2
 import meco_pb2_grpc
+from google.protobuf import json_format
+
+try:
+    from yaml import CSafeDumper as YamlDumper  # libyaml C emitter
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
 
 # Configure logging
 logging.basicConfig(
@@ -26,10 +45,25 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger("meco")
+log_level = os.environ.get("MECO_LOG", "INFO").upper()  # e.g. MECO_LOG=warning on busy servers
+try:
+    logger.setLevel(log_level)
+except ValueError:
+    logger.setLevel(logging.INFO)
+    logger.warning("Unknown MECO_LOG level %r, logging at INFO.", log_level)
 
 
 PID_FILE = "/tmp/meco_server.pid"   # PID file for tracking the daemonized server
+LOG_FILE = "/tmp/meco_server.log"   # stdout/stderr of the daemonized server
 UPLOADS_DIR = "/tmp/meco_uploads"  # Directory for storing received files
+SERVER_ADDRESS = "localhost:50051"  # Address the CLI client connects to
+RPC_TIMEOUT = 30.0  # Deadline in seconds for the CLI client's RPCs
+SHARD_UPLOAD_EXPIRY = 300  # Seconds an incomplete sharded upload is kept after its last activity
+SHUTDOWN_GRACE = 5  # Seconds in-flight RPCs get to complete on SIGTERM/SIGINT
+SHUTDOWN_MARGIN = 2  # Extra seconds "off" waits past SHUTDOWN_GRACE before it sends SIGKILL
+MMAP_THRESHOLD = 64 * 1024  # file_path inputs above this size are parsed from an mmap
+YAML_WRITE_BUFFER = 1 << 20  # 1 MiB, coalesces the YAML emitter's small writes
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 2)  # Overridden by $MECO_WORKERS, checked by create_parser
 
 
 class MecoServiceServicer(meco_pb2_grpc.MecoServiceServicer):
@@ -37,83 +71,361 @@ class MecoServiceServicer(meco_pb2_grpc.MecoServiceServicer):
     Implements:
     1) MecoCall - a simple echo RPC.
     2) Start - supports both file_path and file_content with optional saving.
+    3) StartStream - receives the file content as a stream of chunks, or as one of several
+       shards uploaded in parallel.
+    4) Probe - tells a client whether the server can read its file directly, by path.
+    5) ValidateOnly - confirms a repeated dry run against the copy an earlier dry run saved.
     """
 
-    def MecoCall(self, request, context):
-        logger.info(f"MecoCall received: {request.message}")
+    def __init__(self):
+        # Sharded StartStream uploads in progress:
+        # upload_id -> {"buffer": bytearray, "shards": {offset: length}, "touched": time.monotonic()}
+        self.uploads = {}
+
+    async def MecoCall(self, request, context):
+        logger.info("MecoCall received: %s", request.message)
         response_msg = f"Hello from M-E-C-O! You said: {request.message}"
         return meco_pb2.MecoResponse(message=response_msg)
 
-    def Start(self, request, context):
+    async def Start(self, request, context):
         """Handles the Start RPC, processing file path or content."""
         try:
-            file_content = None  # Initialize file_content
-
-            if request.HasField("file_path"):
-                file_path = request.file_path
-                logger.info(f"Start() received a file path: {file_path}")
+            success, message = await self.start(request)
+        except Exception as e:  # Catch any other unexpected errors
+            logger.exception("An unexpected error occurred: %s", e)
+            success, message = False, f"An unexpected error occurred: {e}"
+        return meco_pb2.StartResponse(success=success, message=message)
 
-                if not os.path.isfile(file_path):
-                    logger.error(f"File does not exist: {file_path}")
-                    return meco_pb2.StartResponse(success=False, message=f"File does not exist: {file_path}")
+    async def StartStream(self, request_iterator, context):
+        """Handles the StartStream RPC, reassembling the file content from its chunks."""
+        try:
+            success, message, shard_pending = await self.start_stream(request_iterator)
+        except Exception as e:  # Catch any other unexpected errors
+            logger.exception("An unexpected error occurred: %s", e)
+            success, message, shard_pending = False, f"An unexpected error occurred: {e}", False
+        return meco_pb2.StartResponse(success=success, message=message, shard_pending=shard_pending)
+
+    async def Probe(self, request, context):
+        """Handles the Probe RPC, checking for the client's file at the same path on the server."""
+        loop = asyncio.get_running_loop()
+        present = await loop.run_in_executor(None, file_matches, request.path, request.size, request.sha256)
+        logger.info("Probe() for %s: %s", request.path, "present" if present else "not present")
+        return meco_pb2.ProbeResponse(already_present=present)
+
+    async def ValidateOnly(self, request, context):
+        """Handles the ValidateOnly RPC, comparing the digest with the one recorded for save_as."""
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, stored_digest_matches, request.save_as, request.sha256):
+            logger.info("ValidateOnly() for %s: stored copy matches.", request.save_as)
+            return meco_pb2.StartResponse(success=True, message="Stored copy matches (dry run).")
+        logger.info("ValidateOnly() for %s: no matching stored copy.", request.save_as)
+        return meco_pb2.StartResponse(success=False, message="No stored copy with this digest.")
+
+    async def start(self, request):
+        """Loads and parses the descriptor of a Start request, returning (success, message)."""
+        save_as = request.save_as if request.HasField("save_as") else None
+        loop = asyncio.get_running_loop()
+
+        if request.HasField("file_path"):
+            file_path = request.file_path
+            logger.info("Start() received a file path: %s", file_path)
+
+            if not os.path.isfile(file_path):
+                logger.error("File does not exist: %s", file_path)
+                return False, f"File does not exist: {file_path}"
+
+            if request.raw_copy and save_as is not None:
+                # Fast path: copy the file as-is, without parsing or converting it
+                save_path = await loop.run_in_executor(None, copy_file, file_path, save_as)
+                logger.info("File copied to: %s", save_path)
+                return True, "File copied successfully."
+
+            # Blocking disk I/O and parsing run in the loop's executor, not on the event loop
+            parsed = await loop.run_in_executor(None, read_and_parse, file_path)
+            logger.info("Successfully read file from path: %s", file_path)
+
+        elif request.HasField("file_content"):
+            logger.info("Start() received inline file content.")
+            # Up to MAX_MESSAGE_LENGTH of JSON: parsed in the executor like file_path inputs
+            parsed = await loop.run_in_executor(None, parse_content, request.file_content)
+
+        elif request.HasField("resource"):
+            logger.info("Start() received a typed resource.")
+            # The client only sends resources that convert back to its exact JSON; this walks every
+            # field in Python, so it runs in the executor
+            parsed = (True, await loop.run_in_executor(None, json_format.MessageToDict, request.resource))
 
-                with open(file_path, "r", encoding="utf-8") as f:
-                    file_content = f.read()  # Read as string
-                logger.info(f"Successfully read file from path: {file_path}")
+        else:
+            logger.error("Start() request missing file_path, file_content and resource.")
+            return False, "No file_path, file_content or resource provided."
 
-            elif request.HasField("file_content"):
-                file_content = request.file_content
-                logger.info("Start() received inline file content.")
+        sha256 = request.sha256 if request.HasField("sha256") else None
+        return await self.process_content(parsed, save_as, request.dry_run, sha256)
 
-            else:
-                logger.error("Start() request missing both file_path and file_content.")
-                return meco_pb2.StartResponse(success=False, message="No file_path or file_content provided.")
+    async def start_stream(self, request_iterator):
+        """Reassembles a StartStream upload from its chunks and parses it, returning (success, message, shard_pending).
 
-            if file_content is None: # Handle the case where no file content was received.
-                return meco_pb2.StartResponse(success=False, message="No file content to process.")
+        The chunks are also checked by check_syntax as they arrive, so a malformed upload is refused
+        without waiting for the rest of it.
+        """
+        meta = meco_pb2.FileMeta()
+        content = bytearray()
+        loop = asyncio.get_running_loop()
+        chunks = queue.SimpleQueue()
+        syntax = None  # check_syntax's future, started with the first data chunk
 
+        try:
+            async for chunk in request_iterator:
+                if chunk.HasField("meta"):
+                    meta = chunk.meta
+                    if meta.HasField("total_size"):  # One shard of a parallel upload
+                        return await self.receive_shard(meta, request_iterator)
+                    continue
+                content += chunk.data
+                if len(content) > MAX_MESSAGE_LENGTH:  # The same limit as a single Start message
+                    logger.error("StartStream() upload exceeds the %s-byte limit.", MAX_MESSAGE_LENGTH)
+                    return False, f"Upload exceeds the {MAX_MESSAGE_LENGTH}-byte limit.", False
+                if syntax is None:
+                    syntax = loop.run_in_executor(None, check_syntax, chunks)
+                chunks.put(chunk.data)
+                if syntax.done() and syntax.result() is not None:
+                    logger.info("StartStream() stopped after %s bytes of file content.", len(content))
+                    return False, syntax.result(), False
+        finally:
+            chunks.put(None)  # Lets check_syntax's thread go, however the stream ended
+        logger.info("StartStream() received %s bytes of file content.", len(content))
+
+        if not content:
+            return False, "No file content to process.", False
+        error = await syntax
+        # Parsed like every other input, and off the event loop so large uploads do not stall other RPCs
+        parsed = (False, error) if error else await loop.run_in_executor(None, parse_content, content)
+
+        save_as = meta.save_as if meta.HasField("save_as") else None
+        sha256 = meta.sha256 if meta.HasField("sha256") else None
+        return (*await self.process_content(parsed, save_as, meta.dry_run, sha256), False)
+
+    async def receive_shard(self, meta, request_iterator):
+        """Stores one shard of a parallel upload; the shard that completes the file gets it processed.
+
+        Shards are out of order, so they are reassembled by offset and parsed only once complete.
+        Returns (success, message, shard_pending).
+        """
+        self.expire_uploads()
+        if meta.total_size > MAX_MESSAGE_LENGTH:  # Checked before the size is used to allocate anything
+            logger.error("StartStream() upload %s declares %s bytes, over the %s-byte limit.",
+                         meta.upload_id, meta.total_size, MAX_MESSAGE_LENGTH)
+            return False, f"Declared total size exceeds the {MAX_MESSAGE_LENGTH}-byte limit.", False
+
+        upload = self.uploads.get(meta.upload_id)
+        if upload is None or len(upload["buffer"]) != meta.total_size:
+            upload = self.uploads[meta.upload_id] = {"buffer": bytearray(meta.total_size), "shards": {}}
+        upload["touched"] = time.monotonic()
+
+        position = meta.offset
+        try:
+            async for chunk in request_iterator:
+                end = position + len(chunk.data)
+                if end > meta.total_size:
+                    self.uploads.pop(meta.upload_id, None)
+                    return False, "Shard data exceeds the declared total size.", False
+                upload["buffer"][position:end] = chunk.data
+                upload["touched"] = time.monotonic()
+                position = end
+        except BaseException:  # The shard stream failed or was cancelled: the upload cannot complete
+            self.uploads.pop(meta.upload_id, None)
+            raise
+
+        # Keyed by offset, so a retried shard is not counted twice
+        upload["shards"][meta.offset] = position - meta.offset
+        received = sum(upload["shards"].values())
+        logger.info("StartStream() received shard at offset %s of upload %s (%s/%s bytes).",
+                    meta.offset, meta.upload_id, received, meta.total_size)
+        if received < meta.total_size:
+            return True, f"Shard received ({received}/{meta.total_size} bytes).", True
+
+        self.uploads.pop(meta.upload_id, None)
+        loop = asyncio.get_running_loop()
+        parsed = await loop.run_in_executor(None, parse_content, upload["buffer"])
+        save_as = meta.save_as if meta.HasField("save_as") else None
+        sha256 = meta.sha256 if meta.HasField("sha256") else None
+        return (*await self.process_content(parsed, save_as, meta.dry_run, sha256), False)
+
+    def expire_uploads(self):
+        """Drops sharded uploads that saw no shard data for SHARD_UPLOAD_EXPIRY seconds."""
+        now = time.monotonic()
+        for upload_id in [i for i, upload in self.uploads.items() if now - upload["touched"] > SHARD_UPLOAD_EXPIRY]:
+            logger.warning("Dropping incomplete upload %s after %s idle seconds.", upload_id, SHARD_UPLOAD_EXPIRY)
+            del self.uploads[upload_id]
+
+    async def process_content(self, parsed, save_as=None, dry_run=False, sha256=None):
+        """Saves the parsed (ok, data) descriptor if requested and processes it, returning (success, message).
+
+        sha256 is the client's digest of the file; a dry run records it next to the saved copy.
+        """
+        ok, data = parsed
+        if not ok:
+            logger.error("Failed to parse file as JSON: %s", data)
+            return False, f"Invalid JSON format: {data}"
+        logger.info("File parsed as JSON successfully.")
+
+        if save_as is not None:  # Only save if save_as is provided
             try:
-                # Attempt to parse as JSON first
-                data = json.loads(file_content)
-                logger.info("File parsed as JSON successfully.")
+                loop = asyncio.get_running_loop()
+                save_path = await loop.run_in_executor(
+                    None, save_as_yaml, data, save_as, sha256 if dry_run else None)
+                logger.info("JSON data saved to: %s", save_path)
+            except Exception as e: # Catch file saving errors
+                logger.exception("An error occurred during file saving: %s", e)
+                return False, f"Error saving file: {e}"
+
+        if dry_run:  # Save only, do not start processing
+            logger.info("Dry run: skipping processing.")
+            if save_as is None:
+                return True, "File content is valid (dry run, not saved)."
+            return True, "File content saved (dry run)."
+
+        # Process the loaded data here (e.g., validate, extract info, etc.)
+        if logger.isEnabledFor(logging.INFO):  # str(data) renders the whole descriptor
+            logger.info("Processed data (first 50 characters): %s...", str(data)[:50])
+
+        return True, "File content processed and saved successfully."
+
+
+def read_and_parse(file_path):
+    """Reads and parses a JSON file, mapping it in memory instead of copying it when it is large."""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+            return parse_content(f.read())  # Small files: mmap setup costs more than the copy
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):  # Linux only
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mm) as view:  # orjson reads the page cache directly, no bytes copy
+                return parse_content(view)
+
+
+def file_matches(file_path, size, sha256):
+    """Returns whether file_path is a regular file of the given size and SHA-256 digest."""
+    try:
+        if not os.path.isfile(file_path) or os.path.getsize(file_path) != size:
+            return False  # Cheap checks first: most misses never hash anything
+        with open(file_path, "rb") as f:
+            if size == 0:
+                return hashlib.sha256().digest() == sha256
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).digest() == sha256
+    except OSError:  # Unreadable, or changed while checking
+        return False
 
-                if request.HasField("save_as"):  # Only save if save_as is provided
-                    save_path = os.path.join(UPLOADS_DIR, request.save_as + ".yaml")  # Save as YAML
-                    os.makedirs(UPLOADS_DIR, exist_ok=True)
-                    with open(save_path, "w", encoding="utf-8") as f:
-                        yaml.dump(data, f)  # Dump as YAML
-                    logger.info(f"JSON data saved to: {save_path}")
 
-            except json.JSONDecodeError as e:  # Catch JSON errors
-                logger.error(f"Failed to parse file as JSON: {e}")
-                return meco_pb2.StartResponse(success=False, message=f"Invalid JSON format: {e}")
-            except Exception as e: # Catch other potential errors
-                logger.exception(f"An error occurred during file saving: {e}")
-                return meco_pb2.StartResponse(success=False, message=f"Error saving file: {e}")
+def copy_file(file_path, save_as):
+    """Copies file_path unchanged into UPLOADS_DIR, keeping its extension, and returns the saved path."""
+    save_path = os.path.join(UPLOADS_DIR, save_as + os.path.splitext(file_path)[1])
+    shutil.copyfile(file_path, save_path)  # Uses sendfile(2) on Linux, a buffered copy elsewhere
+    return save_path
 
-            # Process the loaded data here (e.g., validate, extract info, etc.)
-            logger.info(f"Processed data (first 50 characters): {str(data)[:50]}...")
 
-            return meco_pb2.StartResponse(success=True, message="File content processed and saved successfully.")
+def parse_content(file_content):
+    """Parses JSON content, returning (True, data) or (False, error message)."""
+    try:
+        return True, orjson.loads(file_content)
+    except orjson.JSONDecodeError as e:
+        return False, str(e)
 
-        except Exception as e:  # Catch any other unexpected errors
-            logger.exception(f"An unexpected error occurred: {e}")
-            return meco_pb2.StartResponse(success=False, message=f"An unexpected error occurred: {e}")
 
-def serve_forever():
-    """Starts the gRPC server and runs indefinitely."""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+def check_syntax(chunks):
+    """Runs ijson's incremental parser over the chunks queued for a StartStream upload, up to a None.
+
+    Returns the first syntax error as a message, or None. basic_parse only tokenizes, building no values,
+    so what it rejects orjson rejects too; a document it lets through is still accepted or rejected by
+    parse_content, as on every other path.
+    """
+    events = ijson.sendable_list()
+    parser = ijson.basic_parse_coro(events)
+    while (data := chunks.get()) is not None:
+        try:
+            parser.send(data)
+        except ijson.JSONError as e:
+            error = e.args[0] if e.args else e
+            if isinstance(error, bytes):  # yajl backends report their message as bytes
+                error = error.decode("utf-8", "replace")
+            return str(error).splitlines()[0]
+        except UnicodeDecodeError as e:  # An escaped lone surrogate
+            return str(e)
+        events.clear()
+    return None
+
+
+def save_as_yaml(data, save_as, sha256=None):
+    """Dumps the already parsed data as YAML in UPLOADS_DIR and returns the saved path.
+
+    sha256, if given, is recorded in a save_as.sha256 sidecar for ValidateOnly; any older sidecar is
+    removed first, so it never outlives the copy it describes.
+    """
+    save_path = os.path.join(UPLOADS_DIR, save_as + ".yaml")  # UPLOADS_DIR is created by serve()
+    digest_path = os.path.join(UPLOADS_DIR, save_as + ".sha256")
+    try:
+        os.remove(digest_path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(save_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    with os.fdopen(fd, "w", buffering=YAML_WRITE_BUFFER, encoding="utf-8") as f:
+        yaml.dump(data, f, Dumper=YamlDumper, default_flow_style=False, allow_unicode=True, width=10**9)
+    if sha256:
+        with open(digest_path, "w") as f:
+            f.write(sha256.hex())
+    return save_path
+
+
+def stored_digest_matches(save_as, sha256):
+    """Returns whether UPLOADS_DIR holds a copy of save_as that a dry run saved from content with this digest."""
+    try:
+        with open(os.path.join(UPLOADS_DIR, save_as + ".sha256")) as f:
+            recorded = f.read()
+    except OSError:  # No sidecar: never saved by a dry run, or saved again since
+        return False
+    return recorded == sha256.hex() and os.path.isfile(os.path.join(UPLOADS_DIR, save_as + ".yaml"))
+
+
+async def serve(workers=DEFAULT_WORKERS):
+    """Runs the asyncio gRPC server until it is terminated."""
+    # Blocking file I/O and YAML dumps run on this pool
+    executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="meco-grpc")
+    asyncio.get_running_loop().set_default_executor(executor)
+    os.makedirs(UPLOADS_DIR, exist_ok=True)  # Once per process, not on every save
+
+    server = grpc.aio.server(options=[
+        *MESSAGE_SIZE_OPTIONS,
+        *FLOW_CONTROL_OPTIONS,
+        # Accept the clients' keepalive pings on idle connections instead of answering with GOAWAY
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+    ], compression=grpc.Compression.Gzip)
     meco_pb2_grpc.add_MecoServiceServicer_to_server(MecoServiceServicer(), server)
     server.add_insecure_port("[::]:50051")
-    server.start()
+    await server.start()
     logger.info("Meco gRPC server started on port 50051.")
 
-    try:
-        while True:
-            time.sleep(86400)
-    except KeyboardInterrupt:
+    stop_tasks = []  # Keeps a reference to the pending stop() until it completes
+
+    def shutdown():
         logger.warning("Shutting down server...")
-        server.stop(0)
+        stop_tasks.append(asyncio.ensure_future(server.stop(grace=SHUTDOWN_GRACE)))
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, shutdown)
+
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(0)
+
+
+def serve_forever(workers=DEFAULT_WORKERS):
+    """Starts the gRPC server and runs until it receives SIGTERM or SIGINT."""
+    asyncio.run(serve(workers))
 
 
 def is_running(pid):
@@ -125,102 +437,150 @@ def is_running(pid):
         return False
 
 
-def server_on():
+def is_meco_daemon(pid):
+    """Check that pid is a daemon started by server_on: it leads its own process group and runs __serve__.
+
+    A crashed daemon leaves its PID file behind, and the PID may since belong to an unrelated process.
+    The PID only counts as foreign once its command line has been read and lacks __serve__.
+    """
+    try:
+        if os.getpgid(pid) != pid:
+            return False
+    except OSError:  # Gone
+        return False
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"__serve__" in f.read().split(b"\0")
+    except FileNotFoundError:
+        if os.path.isdir("/proc/self"):  # /proc is there, so the process has just exited
+            return False
+    except OSError:
+        return is_running(pid)
+    try:  # No /proc (macOS, BSD): ask ps instead
+        result = subprocess.run(["ps", "-o", "command=", "-p", str(pid)], capture_output=True, text=True)
+    except OSError:
+        return is_running(pid)
+    if result.returncode != 0:
+        return is_running(pid)
+    return "__serve__" in result.stdout.split()
+
+
+def server_on(workers=DEFAULT_WORKERS):
     """Turns the server ON (daemonizes it)."""
     if os.path.exists(PID_FILE):
         with open(PID_FILE, "r") as f:
             old_pid = int(f.read().strip())
-        if is_running(old_pid):
-            logger.warning(f"Meco server is already ON (PID: {old_pid}).")
+        if is_meco_daemon(old_pid):
+            logger.warning("Meco server is already ON (PID: %s).", old_pid)
             sys.exit(0)
         else:
             os.remove(PID_FILE)
 
-    pid = os.fork()
-    if pid > 0:
-        with open(PID_FILE, "w") as f:
-            f.write(str(pid))
-        logger.info(f"Meco server turned ON in background (PID: {pid}).")
-        sys.exit(0)
-    else:
-        os.setsid()
-        pid2 = os.fork()
-        if pid2 > 0:
-            sys.exit(0)
-        serve_forever()
+    # Spawn a fresh interpreter rather than forking: gRPC does not support fork() after its threads start
+    with open(LOG_FILE, "ab") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "__serve__", "--workers", str(workers)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            start_new_session=True,  # The daemon leads its own session/process group
+            close_fds=True,
+        )
+    with open(PID_FILE, "w") as f:
+        f.write(str(proc.pid))
+    logger.info("Meco server turned ON in background (PID: %s, log: %s).", proc.pid, LOG_FILE)
+    sys.exit(0)
 
 
 def server_off():
-    """Turns the server OFF (robust shutdown - kills ALL meco.py processes)."""
+    """Turns the server OFF by signalling the process group of the PID in PID_FILE."""
+    try:
+        with open(PID_FILE, "r") as f:
+            pid = int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        logger.info("All server-related processes are off.")
+        sys.exit(0)
 
-    # 1. Kill ALL meco.py processes
-    killed_pids = []  # Keep track of killed PIDs to avoid double killing
-    server_process_found = False  # Flag to track if any server process (except this one) is found
-    
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        try:
-            if proc.pid == os.getpid():
-                continue    # Skip the current process to avoid killing the off command itself
-            
-            if "meco.py" in " ".join(proc.cmdline()):
-                server_process_found = True
-                logger.info(f"Killing meco.py process (PID: {proc.pid})")
-
-                # 1. SIGTERM (Polite Shutdown) first
-                os.kill(proc.pid, signal.SIGTERM)
-
-                # 2. Wait for Termination (with timeout)
-                timeout = 5  # seconds
-                for _ in range(timeout):
-                    if not psutil.pid_exists(proc.pid):
-                        break  # Process terminated
-                    time.sleep(1)
-                else:  # If the loop finishes without breaking (timeout)
-                # 3. SIGKILL (Forceful Kill)
-                    logger.warning(f"Process (PID: {proc.pid}) did not respond to SIGTERM. Sending SIGKILL.")
-                    os.kill(proc.pid, signal.SIGKILL)
-
-                killed_pids.append(proc.pid)  # Add PID to list of killed ones
-
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass  # Process might have already exited
-
-    # If no server processes (other than the current off command) are found, log that info.
-    if not server_process_found:
+    if is_meco_daemon(pid):
+        logger.info("Turning OFF Meco server (PID: %s)...", pid)
+
+        # 1. SIGTERM (Polite Shutdown) first, to the daemon's whole process group
+        os.killpg(pid, signal.SIGTERM)
+
+        # 2. Wait for Termination (with timeout)
+        deadline = time.monotonic() + SHUTDOWN_GRACE + SHUTDOWN_MARGIN  # The grace, then time to exit
+        while is_running(pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        # 3. SIGKILL (Forceful Kill)
+        if is_running(pid):
+            logger.warning("Process (PID: %s) did not respond to SIGTERM. Sending SIGKILL.", pid)
+            os.killpg(pid, signal.SIGKILL)
+        logger.info("Meco server turned OFF.")
+    elif is_running(pid):
+        logger.warning("Stale PID file: PID %s is not the Meco server, leaving it alone.", pid)
+    else:
         logger.info("All server-related processes are off.")
 
-    # 2. Remove PID file (if it exists – it might not if the server crashed)
+    # Remove PID file (if it exists – it might not if the server crashed)
     try:
         os.remove(PID_FILE)
         logger.info("PID file removed.")
     except FileNotFoundError:
         pass  # It's okay if the file wasn't there
 
-    sys.exit(0)  # Exit after killing processes
+    sys.exit(0)  # Exit after stopping the server
+
+
+@functools.lru_cache(maxsize=1)
+def get_channel(target=SERVER_ADDRESS):
+    """Returns a gRPC channel to target, created once and reused across calls."""
+    channel = grpc.insecure_channel(target, options=CHANNEL_OPTIONS,
+                                    compression=grpc.Compression.Gzip)  # JSON/YAML descriptors compress well
+    atexit.register(channel.close)  # Close the channel cleanly on exit
+    return channel
 
 
-def start_resource_descriptor(filename=None, file_content=None, save_as=None):
+@functools.lru_cache(maxsize=1)
+def get_stub(target=SERVER_ADDRESS):
+    """Returns the MecoService stub bound to the cached channel."""
+    return meco_pb2_grpc.MecoServiceStub(get_channel(target))
+
+
+def start_resource_descriptor(filename=None, file_content=None, save_as=None, raw_copy=False):
     """Sends either a file_path or file_content to the gRPC server, with optional save_as."""
-    channel = grpc.insecure_channel("localhost:50051")
-    stub = meco_pb2_grpc.MecoServiceStub(channel)
+    stub = get_stub()
 
     if filename:
         if not os.path.exists(filename):
-            logger.error(f'Error: File "{filename}" does not exist.')
+            logger.error('Error: File "%s" does not exist.', filename)
             sys.exit(1)
-        request = meco_pb2.ResourceDescriptor(file_path=filename)
+        request = meco_pb2.ResourceDescriptor(file_path=filename, save_as=save_as, raw_copy=raw_copy)
     elif file_content:
-        request = meco_pb2.ResourceDescriptor(file_content=file_content, save_as=save_as)
+        request = meco_pb2.ResourceDescriptor(file_content=file_content.encode("utf-8"), save_as=save_as)
     else:
         logger.error("Error: No filename or file content provided.")
         sys.exit(1)
 
-    response = stub.Start(request)
+    try:
+        response = stub.Start.future(request, timeout=RPC_TIMEOUT).result()
+    except grpc.RpcError as e:  # Includes an unreachable server and an expired deadline
+        logger.error("Failed to reach the Meco server: %s", e.code())
+        sys.exit(1)
 
     if response.success:
-        logger.info(f"Successfully processed resource: {response.message}")
+        logger.info("Successfully processed resource: %s", response.message)
     else:
-        logger.error(f"Failed to process resource: {response.message}")
+        logger.error("Failed to process resource: %s", response.message)
+
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {number}")
+    return number
 
 
 def create_parser():
@@ -230,15 +590,26 @@ def create_parser():
         prog="meco"
     )
 
-    subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands")
+    subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands",
+                                       metavar="{on,off,start}")  # Keeps __serve__ out of the help
 
-    subparsers.add_parser("on", help="Turn the Meco gRPC server ON (daemon mode)")
+    on_parser = subparsers.add_parser("on", help="Turn the Meco gRPC server ON (daemon mode)")
+    # A string default goes through type= as well, so a bad $MECO_WORKERS is reported like a bad --workers
+    on_parser.add_argument("--workers", type=positive_int, default=os.environ.get("MECO_WORKERS", DEFAULT_WORKERS),
+                           help="Worker threads for blocking file I/O "
+                                "(default: $MECO_WORKERS or min(32, 2 * CPU count))")
     subparsers.add_parser("off", help="Turn the Meco gRPC server OFF")
 
+    # Internal: run the server in the foreground, spawned by 'on'
+    serve_parser = subparsers.add_parser("__serve__")
+    serve_parser.add_argument("--workers", type=positive_int, default=DEFAULT_WORKERS)
+
     start_parser = subparsers.add_parser("start", help="Send a resource descriptor file to the Meco server")
     start_parser.add_argument("filename", nargs="?", help="Path to the resource descriptor file")
     start_parser.add_argument("--content", help="Provide file content directly as a string")
-    start_parser.add_argument("--save-as", help="Filename to store the file on the server (if using content)")
+    start_parser.add_argument("--save-as", help="Filename to store the file on the server")
+    start_parser.add_argument("--raw-copy", action="store_true",
+                              help="With a filename and --save-as, copy the file as-is instead of converting it to YAML")
 
     return parser
 
@@ -253,16 +624,6 @@ def handle_command(args, parser, parser_dict):
         sys.exit(1)
 
 
-def signal_handler(sig, frame):
-    logger.info('You pressed Ctrl+C!')
-    try:
-        if os.path.exists(PID_FILE): # Remove the PID file if it exists
-            os.remove(PID_FILE)
-    except Exception as e:
-        logger.error(f"Error removing PID file: {e}")
-    sys.exit(0)  # Exit cleanly
-
-
 def main():
     """Main function to parse arguments and execute commands."""
     parser = create_parser()
@@ -270,27 +631,13 @@ def main():
     args = parser.parse_args()
 
     parser_dict = {
-        "on": lambda _: server_on(),
+        "on": lambda args: server_on(args.workers),
         "off": lambda _: server_off(),
-        "start": lambda args: start_resource_descriptor(args.filename, args.content, args.save_as),
+        "__serve__": lambda args: serve_forever(args.workers),
+        "start": lambda args: start_resource_descriptor(args.filename, args.content, args.save_as, args.raw_copy),
     }
 
     handle_command(args, parser, parser_dict)
-    
-    if args.command == 'on': # Only start server if the command is 'on'
-        signal.signal(signal.SIGINT, signal_handler)  # Register the signal handler
-
-        try:
-            with open(PID_FILE, "w") as f:
-                f.write(str(os.getpid()))
-
-            server_on()  # Start the gRPC server
-
-        finally:
-            try:
-                os.remove(PID_FILE)  # Remove the PID file when the server is stopped
-            except FileNotFoundError:
-                pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+"""gRPC settings shared by meco.py and meco_test_client.py.
+
+Imports neither grpc nor protobuf, so the test client can load it before it knows it needs them.
+"""
+
+import os
+
+MAX_MESSAGE_LENGTH = 64 << 20  # 64 MiB, instead of gRPC's 4 MiB default
+MESSAGE_SIZE_OPTIONS = [
+    ("grpc.max_send_message_length", MAX_MESSAGE_LENGTH),
+    ("grpc.max_receive_message_length", MAX_MESSAGE_LENGTH),
+]
+FLOW_CONTROL_OPTIONS = [
+    ("grpc.http2.lookahead_bytes", 8 << 20),  # 8 MiB stream window: bulk data flows without waiting on WINDOW_UPDATEs
+]
+KEEPALIVE_OPTIONS = [  # Pings keep idle connections from being dropped by NATs and firewalls between calls
+    ("grpc.keepalive_time_ms", 20000),
+    ("grpc.keepalive_timeout_ms", 10000),  # A ping unanswered this long marks the connection dead
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),  # No cap on pings while no data flows
+]
+CHANNEL_OPTIONS = [  # For client channels; serve() sets the server's own keepalive policy
+    ("grpc.use_local_subchannel_pool", 1),
+    *KEEPALIVE_OPTIONS,
+    *MESSAGE_SIZE_OPTIONS,
+    *FLOW_CONTROL_OPTIONS,
+]
+
+
+def use_upb():
+    """Selects protobuf's upb backend, which builds and serializes messages in C, unless one is already set.
+
+    Must be called before protobuf is first imported.
+    """
+    os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "upb")
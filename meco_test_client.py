@@ -1,10 +1,21 @@
-import grpc
-import meco_pb2
-import meco_pb2_grpc
-import argparse
+import functools
+import hashlib
+import json
+import mmap
 import os
+import random
+import stat
+import sys
+import types
+import uuid
 import logging
 
+from meco_options import MAX_MESSAGE_LENGTH, CHANNEL_OPTIONS, use_upb
+
+# asyncio, grpc and the generated modules are imported by the functions that use them: they take a
+# noticeable part of a run's start-up, which --help and argument errors skip.
+use_upb()
+
 # Configure logging for the client
 logging.basicConfig(
     level=logging.INFO,  # Set logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
@@ -14,49 +25,356 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)  # Get a logger instance for this module
 
-def test_rpc_calls(command, filename=None, localfile=None, saveas=None, dry_run=False):
+SERVER_ADDRESS = "localhost:50051"
+RPC_TIMEOUT = 30.0  # Default deadline in seconds for each RPC
+CONNECT_TIMEOUT = 5.0  # Seconds to wait for the warmed-up channel before issuing the first RPC anyway
+MAX_ATTEMPTS = 5  # Attempts per RPC when it fails with a transient status
+INITIAL_BACKOFF = 1.0  # Seconds before the first retry
+BACKOFF_MULTIPLIER = 1.6
+MAX_BACKOFF = 120.0
+BACKOFF_JITTER = 0.2  # Each delay is randomized by +/- 20%
+RETRYABLE_CODES = {  # grpc.StatusCode names, so the constant does not need grpc imported
+    "UNAVAILABLE",
+    "DEADLINE_EXCEEDED",
+    "RESOURCE_EXHAUSTED",
+}
+PARALLEL_MIN_SIZE = 1 << 20  # Files smaller than this are never split into parallel shards
+CHUNK_SIZE = 64 * 1024  # Default size of each chunk when streaming a local file (64-256 KiB works well)
+UPLOAD_CACHE = os.path.expanduser("~/.meco/upload_cache.json")  # Files earlier dry runs saved on a server
+# Leading bytes of gzip, zip, xz, zstd and bzip2 data: gzipping these again only burns CPU
+COMPRESSED_MAGIC = (b"\x1f\x8b", b"PK\x03\x04", b"\xfd7zXZ\x00", b"\x28\xb5\x2f\xfd", b"BZh")
+
+channels = {}  # (target, channel_id) -> grpc.aio.Channel, closed by close_channels()
+
+
+def get_channel(target=SERVER_ADDRESS, channel_id=0):
+    """Returns an asyncio gRPC channel to target, created once and reused across calls.
+
+    Channels with different channel_id values get their own TCP connection, for parallel uploads.
+    Must be called from the running event loop, which the channel is bound to.
+    """
+    import grpc.aio
+    if (target, channel_id) in channels:
+        return channels[target, channel_id]
+    channel = grpc.aio.insecure_channel(target, options=[
+        ("grpc.channel_id", channel_id),  # Distinct channel args prevent connection sharing
+        *CHANNEL_OPTIONS,
+    ], compression=grpc.Compression.Gzip)  # Default; upload_compression turns it off per call
+    channels[target, channel_id] = channel
+    return channel
+
+
+async def close_channels():
+    """Closes every cached channel; an atexit hook cannot await, so this runs before the event loop ends."""
+    for channel in channels.values():
+        await channel.close()
+    channels.clear()
+    get_stub.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_stub(target=SERVER_ADDRESS, channel_id=0):
+    """Returns a MecoService stub on the (target, channel_id) channel, made once per channel."""
+    import meco_pb2_grpc
+    return meco_pb2_grpc.MecoServiceStub(get_channel(target, channel_id))
+
+
+def file_chunks(f, meta, chunk_size=CHUNK_SIZE, offset=0, length=None):
+    """Yields the StartStream messages for an open binary file: the FileMeta first, then the data chunks.
+
+    offset and length select the byte range to send, for a shard of a parallel upload. grpc.aio drains
+    this plain generator on the event loop; mmap slices are cheap enough not to need a thread.
+    """
+    import meco_pb2
+    yield meco_pb2.ResourceChunk(meta=meta)
+
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:  # Empty files, pipes and devices cannot be mapped: read them instead
+        buffer = bytearray(chunk_size)  # Reused for every chunk instead of a fresh read() result each time
+        view = memoryview(buffer)
+        while n := f.readinto(buffer):
+            yield meco_pb2.ResourceChunk(data=bytes(view[:n]))
+        return
+
+    end = size if length is None else offset + length
+    # Slices of the mapping are paged in on demand, with no read() buffer or text decode in between
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mmap, "MADV_WILLNEED"):  # Linux only
+            start = offset - offset % mmap.PAGESIZE  # madvise() ranges must start on a page boundary
+            mm.madvise(mmap.MADV_SEQUENTIAL, start, end - start)
+            mm.madvise(mmap.MADV_WILLNEED, start, end - start)  # Read ahead now, not page fault by page fault
+        for position in range(offset, end, chunk_size):
+            yield meco_pb2.ResourceChunk(data=mm[position:min(position + chunk_size, end)])
+
+
+async def upload_shards(f, name, saveas, dry_run, parallel, chunk_size, target, timeout, sha256=None):
+    """Uploads a regular file as parallel shards, one StartStream call per channel, and returns the final response."""
+    import asyncio
+    import meco_pb2
+    size = os.fstat(f.fileno()).st_size
+    shard_size = -(-size // parallel)  # Ceiling division
+    upload_id = uuid.uuid4().hex
+    compression = upload_compression(f)
+
+    def start_shard(channel_id, offset):
+        meta = meco_pb2.FileMeta(save_as=saveas, dry_run=dry_run, upload_id=upload_id, offset=offset, total_size=size,
+                                 sha256=sha256)
+        chunks = file_chunks(f, meta, chunk_size, offset, min(shard_size, size - offset))
+        return get_stub(target, channel_id).StartStream(chunks, timeout=timeout, compression=compression)
+
+    responses = await asyncio.gather(*(
+        call_with_retry(lambda channel_id=channel_id, offset=offset: start_shard(channel_id, offset),
+                        f"Start({name}) shard at offset {offset}")
+        for channel_id, offset in enumerate(range(0, size, shard_size))
+    ))
+    # A failed shard wins; otherwise the shard that completed the upload carries the result
+    for response in responses:
+        if not response.success:
+            return response
+    final = next((response for response in responses if not response.shard_pending), None)
+    if final is None:  # e.g. a retried shard arrived after the upload completed and started a new one
+        return meco_pb2.StartResponse(
+            success=False, message="Upload incomplete: the server still waits for shards; retry the upload.")
+    return final
+
+
+def file_sha256(f):
+    """Returns the SHA-256 digest of an open regular file, hashed from an mmap."""
+    if os.fstat(f.fileno()).st_size == 0:
+        return hashlib.sha256().digest()
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return hashlib.sha256(mm).digest()
+
+
+async def server_has_file(stub, f, path, sha256, timeout):
+    """Returns whether the server sees the same file at path, by size and SHA-256, so it can read it itself."""
+    import grpc
+    import meco_pb2
+    request = meco_pb2.ProbeRequest(path=path, size=os.fstat(f.fileno()).st_size, sha256=sha256)
+    try:
+        response = await stub.Probe(request, timeout=timeout)
+    except grpc.RpcError as e:  # e.g. a server without Probe: fall back to uploading the content
+        logger.debug("Probe(%s) failed with %s", path, e.code())
+        return False
+    return response.already_present
+
+
+def load_upload_cache():
+    """Returns the upload cache: "target path save_as" -> {"mtime_ns", "size", "sha256"} of the dry-run upload."""
+    try:
+        with open(UPLOAD_CACHE, "rb") as f:
+            return json.load(f)
+    except (OSError, ValueError):  # Missing or corrupt: nothing is known to be on any server
+        return {}
+
+
+def remember_upload(key, f, sha256):
+    """Records in the upload cache that a dry run saved the file open as f, with its digest."""
+    st = os.fstat(f.fileno())
+    cache = load_upload_cache()
+    cache[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha256.hex()}
+    temp_path = f"{UPLOAD_CACHE}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(UPLOAD_CACHE), exist_ok=True)
+        with open(temp_path, "w") as out:
+            json.dump(cache, out)
+        os.replace(temp_path, UPLOAD_CACHE)  # Atomic, so concurrent runs never read a half-written cache
+    except OSError as e:
+        logger.warning("Could not update the upload cache: %r", e)
+
+
+async def validate_cached(stub, f, key, save_as, timeout):
+    """Returns the ValidateOnly response if the server still holds the unchanged file cached under key, else None."""
+    import grpc
+    import meco_pb2
+    entry = load_upload_cache().get(key)
+    st = os.fstat(f.fileno())
+    if entry is None or (entry["mtime_ns"], entry["size"]) != (st.st_mtime_ns, st.st_size):
+        return None
+    request = meco_pb2.ValidateRequest(save_as=save_as, sha256=bytes.fromhex(entry["sha256"]))
+    try:
+        response = await stub.ValidateOnly(request, timeout=timeout)
+    except grpc.RpcError as e:  # e.g. a server without ValidateOnly: upload the file as usual
+        logger.debug("ValidateOnly(%s) failed with %s", save_as, e.code())
+        return None
+    return response if response.success else None
+
+
+def load_resource(f):
+    """Parses an open JSON file into a typed meco_pb2.Resource, or returns None if it does not fit the message.
+
+    The server turns the message back into JSON data, so it is only used if that gives back exactly the
+    parsed file: ParseDict would otherwise save 40 as 40.0, drop empty lists and rename orbital_plane keys.
+    """
+    import orjson  # Only needed for --structured uploads
+    from google.protobuf import json_format
+    import meco_pb2
+
+    try:
+        data = orjson.loads(f.read())
+    except orjson.JSONDecodeError as e:
+        logger.info("Not sending a typed resource: %s", str(e).splitlines()[0])
+        return None
+    if not isinstance(data, dict):  # ParseDict raises TypeError on anything but an object
+        logger.info("Not sending a typed resource: the JSON is not an object")
+        return None
+    try:
+        resource = json_format.ParseDict(data, meco_pb2.Resource())
+    except json_format.ParseError as e:
+        logger.info("Not sending a typed resource: %s", str(e).splitlines()[0])
+        return None
+    # Serialized with sorted keys, so ints and floats compare unequal where == would call 40 and 40.0 equal
+    if (orjson.dumps(json_format.MessageToDict(resource), option=orjson.OPT_SORT_KEYS)
+            != orjson.dumps(data, option=orjson.OPT_SORT_KEYS)):
+        logger.info("Not sending a typed resource: it would not convert back to the same JSON")
+        return None
+    if resource.ByteSize() > MAX_MESSAGE_LENGTH:
+        logger.info("Not sending a typed resource: larger than %s bytes", MAX_MESSAGE_LENGTH)
+        return None
+    return resource
+
+
+def upload_compression(f):
+    """Returns the compression for uploading an open binary file: none if its content is already compressed."""
+    import grpc
+    if f.peek(8)[:8].startswith(COMPRESSED_MAGIC):  # peek() does not move the file position
+        return grpc.Compression.NoCompression
+    return grpc.Compression.Gzip
+
+
+async def call_with_retry(start_call, description, max_attempts=MAX_ATTEMPTS):
+    """Returns the response of the call made by start_call(), retrying transient failures with backoff.
+
+    Other status codes are raised immediately.
+    """
+    import asyncio
+    import grpc
+    backoff = INITIAL_BACKOFF
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await start_call()
+        except grpc.RpcError as e:
+            if e.code().name not in RETRYABLE_CODES or attempt == max_attempts:
+                raise
+            delay = backoff * (1 + random.uniform(-BACKOFF_JITTER, BACKOFF_JITTER))
+            logger.warning("%s failed with %s (attempt %s/%s), retrying in %.1fs",
+                           description, e.code(), attempt, max_attempts, delay)
+            await asyncio.sleep(delay)  # Other calls on the loop keep going while this one waits
+            backoff = min(backoff * BACKOFF_MULTIPLIER, MAX_BACKOFF)
+
+
+async def test_rpc_calls(command, filenames=None, localfile=None, saveas=None, dry_run=False, raw_copy=False,
+                         chunk_size=CHUNK_SIZE, target=SERVER_ADDRESS, timeout=RPC_TIMEOUT, parallel=1, probe=True,
+                         structured=False):
     """Tests the Meco gRPC service."""
+    import asyncio
+    import grpc
+    import meco_pb2
+
+    ready = None
     try:
-        channel = grpc.insecure_channel("localhost:50051")  # Create a gRPC channel
-        stub = meco_pb2_grpc.MecoServiceStub(channel)  # Create a stub for the service
+        stub = get_stub(target)  # Reuse the cached channel and stub
+        # Start connecting now, so the handshake overlaps with opening the file and building the requests
+        ready = asyncio.ensure_future(get_channel(target).channel_ready())
 
         if command == "start":
-            start_req = None  # Initialize the request variable
+            start_reqs = []  # (filename, request) pairs, built up-front
 
-            if filename:
-                logger.info(f"Sending file path: {filename}")
-                start_req = meco_pb2.ResourceDescriptor(file_path=filename, dry_run=dry_run)
+            if filenames:
+                for i, filename in enumerate(filenames):
+                    logger.info("Sending file path: %s", filename)
+                    # With several files, number the save_as names so they do not overwrite each other
+                    save_as = f"{saveas}_{i}" if saveas and len(filenames) > 1 else saveas
+                    start_reqs.append((filename, meco_pb2.ResourceDescriptor(
+                        file_path=filename, save_as=save_as, dry_run=dry_run, raw_copy=raw_copy)))
             elif localfile:
                 if not os.path.exists(localfile):
-                    logger.error(f"Error: File '{localfile}' does not exist.")
+                    logger.error("Error: File '%s' does not exist.", localfile)
                     return  # Exit the function if the file doesn't exist
 
                 try:
-                    with open(localfile, "r", encoding="utf-8") as f:
-                        file_content = f.read()
-                    logger.info(f"Sending local file content (first 50 chars): {file_content[:50]}...")
-                    start_req = meco_pb2.ResourceDescriptor(file_content=file_content, save_as=saveas, dry_run=dry_run)
-                except Exception as e: # Catch file reading errors
-                    logger.error(f"Error reading local file: {e}")
+                    local_f = open(localfile, "rb")
+                except OSError as e:  # Catch file opening errors: expected, so no traceback
+                    logger.error("Error reading local file: %r", e)
                     return
 
             else:
                 logger.error("Error: Either filename or localfile must be provided for 'start' command.")
                 return  # Exit if no file info is given
 
-            if start_req is None: # Exit if the request is still None
-                logger.error("Error: No request was created.")
-                return
+            try:
+                await asyncio.wait_for(ready, CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass  # Not connected yet: the RPCs' own retries deal with an unreachable server
 
-            try:  # Try making the gRPC call; handle connection errors
-                response = stub.Start(start_req)
-                if response.success:
-                    logger.info(f"Start({filename or localfile}) -> Success: {response.message}")
+            try:  # Try making the gRPC calls; handle connection errors
+                if start_reqs:
+                    # The calls run concurrently on the event loop; gather keeps the results in request order
+                    responses = await asyncio.gather(*(
+                        call_with_retry(lambda req=req: stub.Start(req, timeout=timeout), f"Start({filename})")
+                        for filename, req in start_reqs
+                    ))
+                    results = [(filename, response) for (filename, _), response in zip(start_reqs, responses)]
                 else:
-                    logger.error(f"Start({filename or localfile}) -> Error: {response.message}")
+                    def start_upload():
+                        if local_f.seekable():
+                            local_f.seek(0)  # A retry re-sends the file from the beginning
+                        meta = meco_pb2.FileMeta(save_as=saveas, dry_run=dry_run, sha256=digest)
+                        return stub.StartStream(file_chunks(local_f, meta, chunk_size),
+                                                timeout=timeout, compression=upload_compression(local_f))
+
+                    with local_f:
+                        local_path = os.path.abspath(localfile)
+                        regular = stat.S_ISREG(os.fstat(local_f.fileno()).st_mode)  # Can be re-read
+                        # A repeated dry run of an unchanged file only needs the server to confirm its copy
+                        cached = dry_run and saveas and regular
+                        cache_key = f"{target} {local_path} {saveas}"
+                        response = await validate_cached(stub, local_f, cache_key, saveas, timeout) if cached else None
+                        digest = None
+                        if regular and (probe or cached) and response is None:
+                            # Hashing a large file would stall the event loop
+                            digest = await asyncio.to_thread(file_sha256, local_f)
+
+                        if response is not None:
+                            logger.info("%s is unchanged since its last dry run, validated instead of uploaded",
+                                        localfile)
+                            results = [(localfile, response)]
+                        elif probe and regular and await server_has_file(stub, local_f, local_path, digest, timeout):
+                            # Shared filesystem: the server reads the file itself, nothing is uploaded
+                            logger.info("Server already has %s, sending its path instead of the content", localfile)
+                            req = meco_pb2.ResourceDescriptor(
+                                file_path=local_path, save_as=saveas, dry_run=dry_run, raw_copy=raw_copy, sha256=digest)
+                            results = [(localfile, await call_with_retry(lambda: stub.Start(req, timeout=timeout),
+                                                                         f"Start({localfile})"))]
+                        elif structured and regular and (resource := await asyncio.to_thread(load_resource, local_f)):
+                            # Parsed once here; the server gets typed fields instead of JSON text to parse
+                            logger.info("Sending %s as a typed resource (%s bytes)", localfile, resource.ByteSize())
+                            req = meco_pb2.ResourceDescriptor(resource=resource, save_as=saveas, dry_run=dry_run,
+                                                              sha256=digest)
+                            results = [(localfile, await call_with_retry(lambda: stub.Start(req, timeout=timeout),
+                                                                         f"Start({localfile})"))]
+                        elif parallel > 1 and os.fstat(local_f.fileno()).st_size >= PARALLEL_MIN_SIZE:
+                            logger.info("Uploading %s as %s parallel shards", localfile, parallel)
+                            results = [(localfile, await upload_shards(local_f, localfile, saveas, dry_run, parallel,
+                                                                       chunk_size, target, timeout, digest))]
+                        else:
+                            logger.info("Streaming local file content in %s-byte chunks: %s", chunk_size, localfile)
+                            # A pipe cannot be rewound, so its upload is attempted only once
+                            attempts = MAX_ATTEMPTS if local_f.seekable() else 1
+                            results = [(localfile, await call_with_retry(start_upload, f"Start({localfile})",
+                                                                         max_attempts=attempts))]
+
+                        if cached and digest is not None and results[0][1].success:
+                            remember_upload(cache_key, local_f, digest)
+
+                for name, response in results:
+                    if response.success:
+                        logger.info("Start(%s) -> Success: %s", name, response.message)
+                    else:
+                        logger.error("Start(%s) -> Error: %s", name, response.message)
 
             except grpc.RpcError as e:  # Catch gRPC errors (including connection failures)
-                logger.error(f"gRPC Error (likely server offline): {e}")
+                logger.error("gRPC Error: %s %r", e.code(), e.details())
                 if e.code() == grpc.StatusCode.UNAVAILABLE: # Check if the server is unavailable
                     logger.error("The server is likely offline or unreachable.")
                 return  # Exit the function after reporting the error
@@ -64,19 +382,119 @@ def test_rpc_calls(command, filename=None, localfile=None, saveas=None, dry_run=
         else:
             logger.error("Invalid command. Use 'start'.")
 
+    except OSError as e:  # The local file failed while being hashed, parsed or streamed
+        logger.error("Error reading local file: %r", e)
+
     except Exception as e:
-        logger.exception(f"Client-side Error: {e}")  # Handle other client-side errors
+        logger.exception("Client-side Error: %s", e)  # Unexpected: only here is the traceback worth formatting
 
+    finally:
+        if ready is not None:
+            ready.cancel()  # Harmless once connected; stops the wait after an early return
+        await close_channels()
 
 
-if __name__ == "__main__":
+
+# Command-line options with a value: option -> (destination, type), shared by both parsers below
+VALUE_OPTIONS = {
+    "--file": ("localfile", str),
+    "--saveas": ("saveas", str),
+    "--server": ("server", str),
+    "--timeout": ("timeout", float),
+    "--parallel": ("parallel", int),
+    "--chunk_size": ("chunk_size", int),
+    "--pin_cpu": ("pin_cpu", int),
+}
+# Flag options: option -> (destination, value when given)
+FLAG_OPTIONS = {
+    "--dry_run": ("dry_run", True),
+    "--raw_copy": ("raw_copy", True),
+    "--structured": ("structured", True),
+    "--no_probe": ("probe", False),
+}
+OPTION_DEFAULTS = {
+    "localfile": None, "saveas": None, "server": SERVER_ADDRESS, "timeout": RPC_TIMEOUT, "parallel": 1,
+    "chunk_size": CHUNK_SIZE, "dry_run": False, "raw_copy": False, "structured": False, "probe": True,
+    "pin_cpu": None,
+}
+
+
+def create_parser():
+    """Creates the full argparse parser, used for --help, errors and anything parse_args() does not handle."""
+    import argparse
+
     parser = argparse.ArgumentParser(description="Test Meco gRPC Client with flexible file input")
+    parser.set_defaults(**OPTION_DEFAULTS)
     parser.add_argument("command", choices=["start"], help="Command to execute")
-    parser.add_argument("filename", nargs="?", help="File path to send (for remote server access)")
-    parser.add_argument("--file", dest="localfile", help="Read local file and send as content")
+    parser.add_argument("filenames", nargs="*", metavar="filename",
+                        help="File path(s) to send (for remote server access); several paths are sent concurrently")
+    parser.add_argument("--file", dest="localfile", help="Read local file and stream it as content")
     parser.add_argument("--saveas", help="Specify remote filename to save the file as")
     parser.add_argument("--dry_run", action="store_true", help="Save the file without starting the emulation")
-    
-    args = parser.parse_args()
+    parser.add_argument("--raw_copy", action="store_true", help="Copy the remote file as-is when used with --saveas")
+    parser.add_argument("--structured", action="store_true",
+                        help="Parse --file locally and send it as a typed Resource message when it converts "
+                             "back to identical JSON (smaller on the wire, more CPU on both ends)")
+    parser.add_argument("--no_probe", dest="probe", action="store_false",
+                        help="Always upload --file content, without first checking whether the server can read it")
+    parser.add_argument("--server", help=f"Address of the Meco server (default: {SERVER_ADDRESS})")
+    parser.add_argument("--timeout", type=float, help=f"Deadline in seconds for each RPC (default: {RPC_TIMEOUT})")
+    parser.add_argument("--parallel", type=int,
+                        help=f"Upload --file files of at least {PARALLEL_MIN_SIZE} bytes as this many shards "
+                             "over separate connections (default: 1)")
+    parser.add_argument("--chunk_size", type=int,
+                        help=f"Chunk size in bytes when streaming --file (default: {CHUNK_SIZE})")
+    parser.add_argument("--pin_cpu", type=int, metavar="N",
+                        help="Run the client on CPU N only, for steadier timings in benchmarks (Linux)")
+    return parser
+
+
+def parse_args(argv):
+    """Parses the command line in one pass over argv, without building the argparse parser.
+
+    Help requests, mistakes and anything unusual (abbreviated options, "-" arguments, filenames after
+    an option, which argparse rejects) are handed to create_parser(), so they get argparse's usual messages.
+    """
+    if not argv or argv[0] != "start":
+        return create_parser().parse_args(argv)
+    args = types.SimpleNamespace(command="start", filenames=[], **OPTION_DEFAULTS)
+    rest = iter(argv[1:])
+    options_seen = False
+    for arg in rest:
+        if not arg.startswith("-"):
+            if options_seen:  # argparse takes the filenames in one run: later ones are unrecognized
+                return create_parser().parse_args(argv)
+            args.filenames.append(arg)
+            continue
+        options_seen = True
+        if arg in FLAG_OPTIONS:
+            dest, value = FLAG_OPTIONS[arg]
+            setattr(args, dest, value)
+        else:
+            option, equals, value = arg.partition("=")
+            if not equals:
+                value = next(rest, None)
+            if option not in VALUE_OPTIONS or value is None or (not equals and value.startswith("-")):
+                return create_parser().parse_args(argv)
+            dest, convert = VALUE_OPTIONS[option]
+            try:
+                setattr(args, dest, convert(value))
+            except ValueError:
+                return create_parser().parse_args(argv)
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    import asyncio  # Only now: --help and argument errors exit before paying for it
+    if args.chunk_size <= 0:
+        create_parser().error("--chunk_size must be a positive number of bytes")
+    if args.parallel <= 0:
+        create_parser().error("--parallel must be a positive number of shards")
+    if args.pin_cpu is not None:
+        try:
+            os.sched_setaffinity(0, {args.pin_cpu})  # No migrations between cores mid-upload
+        except (AttributeError, OSError) as e:  # Not Linux, or no such CPU
+            create_parser().error(f"--pin_cpu {args.pin_cpu}: {e}")
 
-    test_rpc_calls(args.command, filename=args.filename, localfile=args.localfile, saveas=args.saveas, dry_run=args.dry_run)
+    asyncio.run(test_rpc_calls(args.command, filenames=args.filenames, localfile=args.localfile, saveas=args.saveas, dry_run=args.dry_run, raw_copy=args.raw_copy, chunk_size=args.chunk_size, target=args.server, timeout=args.timeout, parallel=args.parallel, probe=args.probe, structured=args.structured))
@@ -0,0 +1,58 @@
+"""Checks that meco_test_client's fast parse_args() agrees with its argparse parser."""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import meco_test_client  # noqa: E402  (grpc and the generated stubs are only imported later, on use)
+
+# Command lines: each must give the same namespace, or the same exit, from both parsers
+COMMAND_LINES = [
+    [],
+    ["stop"],
+    ["start"],
+    ["start", "-h"],
+    ["start", "a"],
+    ["start", "a", "b", "--saveas", "x", "--dry_run"],
+    ["start", "--file=f", "--timeout", "2.5", "--parallel", "3", "--chunk_size=100", "--no_probe",
+     "--structured", "--raw_copy", "--server", "h:1", "--pin_cpu", "0"],
+    ["start", "--file", "-"],
+    ["start", "--file", "f", "--file", "g"],
+    ["start", "--saveas"],
+    ["start", "--saveas="],
+    ["start", "--timeout", "abc"],
+    ["start", "--timeout", "-1"],
+    ["start", "--sav", "x"],
+    ["start", "--dry_run=1"],
+    ["start", "--", "a"],
+    # argparse takes the filenames in one run: a filename after an option is unrecognized
+    ["start", "--dry_run", "a"],
+    ["start", "a", "--dry_run", "b"],
+    ["start", "--file", "f", "a"],
+    ["start", "a", "--file", "x", "b"],
+]
+
+
+def parse(parse_args, argv):
+    """Returns the parsed options as a dict, or ("exit", code) if parsing exits."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        try:
+            return vars(parse_args(argv))
+        except SystemExit as e:
+            return ("exit", e.code)
+
+
+class ParseArgsTest(unittest.TestCase):
+    def test_fast_parser_matches_argparse(self):
+        for argv in COMMAND_LINES:
+            with self.subTest(argv=argv):
+                self.assertEqual(parse(meco_test_client.parse_args, argv),
+                                 parse(meco_test_client.create_parser().parse_args, argv))
+
+
+if __name__ == "__main__":
+    unittest.main()
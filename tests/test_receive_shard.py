@@ -0,0 +1,80 @@
+"""Checks how the server reassembles sharded StartStream uploads in receive_shard()."""
+
+import logging
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    import meco  # noqa: E402
+    import meco_pb2  # noqa: E402
+    IMPORT_ERROR = None
+except ImportError as e:  # grpc, or the stubs generated from meco.proto
+    IMPORT_ERROR = f"meco cannot be imported: {e}"
+
+DOCUMENT = b'{"a": [1, 2]}'
+UPLOAD_ID = "upload"
+
+
+async def chunks(*datas):
+    """Stands in for the rest of a StartStream request iterator, after the FileMeta chunk."""
+    for data in datas:
+        yield meco_pb2.ResourceChunk(data=data)
+
+
+@unittest.skipIf(IMPORT_ERROR, IMPORT_ERROR)
+class ReceiveShardTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.servicer = meco.MecoServiceServicer()
+
+    async def send(self, offset, *datas, total_size=len(DOCUMENT), upload_id=UPLOAD_ID):
+        """Sends one shard as a dry run without save_as, so a complete upload is parsed but not saved."""
+        meta = meco_pb2.FileMeta(dry_run=True, upload_id=upload_id, offset=offset, total_size=total_size)
+        return await self.servicer.receive_shard(meta, chunks(*datas))
+
+    async def test_out_of_order_shards(self):
+        self.assertEqual(await self.send(6, DOCUMENT[6:9], DOCUMENT[9:]),
+                         (True, "Shard received (7/13 bytes).", True))
+        success, _, pending = await self.send(0, DOCUMENT[:6])
+        self.assertEqual((success, pending), (True, False))
+        self.assertEqual(self.servicer.uploads, {})
+
+    async def test_retried_shard_is_counted_once(self):
+        await self.send(0, DOCUMENT[:6])
+        self.assertEqual(await self.send(0, DOCUMENT[:6]), (True, "Shard received (6/13 bytes).", True))
+        success, _, pending = await self.send(6, DOCUMENT[6:])
+        self.assertEqual((success, pending), (True, False))
+
+    async def test_invalid_document_fails_once_complete(self):
+        await self.send(0, b'{"a": [1, ')
+        success, message, pending = await self.send(10, b"2}}")
+        self.assertEqual((success, pending), (False, False))
+        self.assertIn("Invalid JSON format", message)
+
+    async def test_oversized_total_size(self):
+        success, _, pending = await self.send(0, b"{}", total_size=meco.MAX_MESSAGE_LENGTH + 1)
+        self.assertEqual((success, pending), (False, False))
+        self.assertEqual(self.servicer.uploads, {})  # Refused before a buffer is allocated
+
+    async def test_data_beyond_total_size(self):
+        await self.send(0, DOCUMENT[:6])
+        self.assertEqual(await self.send(6, DOCUMENT[6:], b"  "),
+                         (False, "Shard data exceeds the declared total size.", False))
+        self.assertEqual(self.servicer.uploads, {})
+
+    async def test_idle_upload_expires(self):
+        await self.send(0, DOCUMENT[:6])
+        self.servicer.uploads[UPLOAD_ID]["touched"] = time.monotonic() - meco.SHARD_UPLOAD_EXPIRY - 1
+        await self.send(0, b"{}", total_size=2, upload_id="other")
+        self.assertNotIn(UPLOAD_ID, self.servicer.uploads)
+        # The rest of the expired upload starts over instead of completing it
+        self.assertEqual(await self.send(6, DOCUMENT[6:]), (True, "Shard received (7/13 bytes).", True))
+
+
+if __name__ == "__main__":
+    unittest.main()